@@ -1,10 +1,11 @@
+import asyncio
 import gradio as gr
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 from converter_fw import VideoConverter
-import tempfile
-import shutil
+import psutil
 
 
 class VideoConverterGUI:
@@ -15,12 +16,25 @@ class VideoConverterGUI:
         self.output_dir = os.path.join(os.getcwd(), "converted_videos")
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Define video extensions
-        self.video_extensions = [
-            ".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".mpeg",
-            ".MP4", ".AVI", ".MKV", ".MOV", ".WMV", ".FLV", ".MPEG"
+        # Size the worker pool from CPU count and available RAM
+        # (roughly one FFmpeg per 2 GB, capped at 16)
+        ram_workers = psutil.virtual_memory().available // (2 * 1024 ** 3)
+        self.max_workers = max(1, min(ram_workers, 16, os.cpu_count() or 1))
+
+        # Resolution rungs, highest first (also the dropdown order)
+        self.resolution_ladder = [
+            "3840x2160 (4K)",
+            "2560x1440 (1440p)",
+            "1920x1080 (1080p)",
+            "1280x720 (720p)",
+            "854x480 (480p)"
         ]
 
+        # Define video extensions (compared lowercase)
+        self.video_extensions = frozenset({
+            ".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".mpeg"
+        })
+
     def generate_output_filename(self, input_filename, output_format):
         name = Path(input_filename).stem
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -32,33 +46,28 @@ class VideoConverterGUI:
             return None
         return files[0]
 
-    def create_temp_copy(self, file_path):
-        """Create a temporary copy of the input file"""
-        file_ext = os.path.splitext(file_path)[1]
-        temp_file = tempfile.NamedTemporaryFile(suffix=file_ext, delete=False)
-        temp_path = temp_file.name
-        temp_file.close()
-        shutil.copy2(file_path, temp_path)
-        return temp_path
-
     def is_valid_video(self, file_path):
         """Check if file has a valid video extension"""
-        return any(file_path.lower().endswith(ext.lower()) for ext in self.video_extensions)
+        return os.path.splitext(file_path)[1].lower() in self.video_extensions
+
+    def resolution_label(self, resolution):
+        """Short label for a resolution choice, e.g. '1280x720 (720p)' -> '720p'"""
+        return resolution.split("(")[-1].rstrip(")")
 
-    def convert_videos(self, files, output_format, codec, resolution, bitrate, bitrate_unit, fps, progress=gr.Progress()):
+    def convert_videos(self, files, output_format, codec, resolution, ladder, bitrate, bitrate_unit, fps, progress=gr.Progress()):
         if not files:
             return "Please upload video files.", []
 
-        results = []
-        output_files = []
-        temp_files = []
-
         # Filter valid video files
         valid_files = [f for f in files if self.is_valid_video(f.name)]
 
         if not valid_files:
             return "No valid video files found. Please upload video files.", []
 
+        # Longest-job-first: start the biggest files first so workers
+        # aren't left idling behind one large encode at the tail
+        valid_files.sort(key=lambda f: os.path.getsize(f.name), reverse=True)
+
         total_files = len(valid_files)
         file_weight = 1.0 / total_files
 
@@ -77,60 +86,134 @@ class VideoConverterGUI:
         else:
             bitrate_value = "auto"
 
-        try:
-            for i, file in enumerate(valid_files):
-                try:
-                    base_progress = i * file_weight
-
-                    # Create a temporary copy of the input file
-                    temp_input_path = self.create_temp_copy(file.name)
-                    temp_files.append(temp_input_path)
-
-                    original_filename = os.path.basename(file.name)
-                    progress(base_progress, desc=f"Converting {original_filename}")
-
-                    def progress_callback(file_progress):
-                        total_progress = base_progress + (file_progress * file_weight)
-                        progress(total_progress)
-
-                    output_filename = self.generate_output_filename(original_filename, output_format)
-
-                    print(f"Converting {temp_input_path} to {output_filename}")  # Debug print
-
-                    success, message = self.converter.convert_video(
-                        temp_input_path,
-                        output_format,
-                        codec,
-                        self.output_dir,
-                        progress_callback,
-                        output_filename,
-                        resolution,
-                        bitrate_value,
-                        fps
+        # With the ladder enabled, each file is encoded at the chosen
+        # resolution and every lower rung, cascading rung from rung
+        if ladder:
+            if resolution == "Same as input":
+                rung_resolutions = list(self.resolution_ladder)
+            else:
+                rung_resolutions = self.resolution_ladder[self.resolution_ladder.index(resolution):]
+        else:
+            rung_resolutions = [resolution]
+
+        jobs = []
+        for file in valid_files:
+            # FFmpeg reads the uploaded file in place
+            input_path = os.path.realpath(file.name)
+            original_filename = os.path.basename(file.name)
+            if len(rung_resolutions) > 1:
+                stem = Path(original_filename).stem
+                output_filenames = [
+                    self.generate_output_filename(f"{stem}_{self.resolution_label(res)}", output_format)
+                    for res in rung_resolutions
+                ]
+            else:
+                output_filenames = [self.generate_output_filename(original_filename, output_format)]
+            print(f"Converting {input_path} to {', '.join(output_filenames)}")  # Debug print
+            jobs.append((input_path, original_filename, output_filenames))
+
+        # Split CPU threads across however many FFmpeg children actually
+        # run at once so concurrent encodes don't oversubscribe cores
+        concurrency = min(self.max_workers, total_files)
+        self.converter.threads = max(1, (os.cpu_count() or 1) // concurrency)
+
+        progress(0, desc=f"Converting {total_files} files with up to {self.max_workers} at once")
+
+        # One event loop multiplexes all concurrent FFmpeg children
+        file_progress = [0.0] * total_files
+
+        # Coalesce progress updates: FFmpeg reports many times a second,
+        # but the UI only needs ~1% granularity
+        last_emit = [0.0, 0.0]  # (progress value, monotonic time)
+
+        def emit_progress():
+            total_progress = sum(file_progress) * file_weight
+            now = time.monotonic()
+            if total_progress - last_emit[0] >= 0.01 or now - last_emit[1] >= 0.1:
+                progress(total_progress)
+                last_emit[0] = total_progress
+                last_emit[1] = now
+
+        async def run_batch():
+            pool = asyncio.Semaphore(self.max_workers)
+            # NVENC sessions are limited per GPU, so GPU-eligible jobs
+            # serialize while CPU jobs keep going in parallel
+            gpu_lock = asyncio.Semaphore(1)
+            needs_gpu = self.converter.gpu_available and codec in ("H.264", "HEVC (H.265)")
+
+            async def run_one(index, input_path, output_filenames):
+                def progress_callback(fp):
+                    file_progress[index] = min(fp, 1.0)
+                    emit_progress()
+
+                async with pool:
+                    if len(rung_resolutions) > 1:
+                        # The cascade chains sync conversions; run it off
+                        # the event loop thread
+                        if needs_gpu:
+                            async with gpu_lock:
+                                return await asyncio.to_thread(
+                                    self.converter.convert_video_cascade,
+                                    input_path, output_format, codec, self.output_dir,
+                                    rung_resolutions, progress_callback, output_filenames,
+                                    bitrate_value, fps
+                                )
+                        return await asyncio.to_thread(
+                            self.converter.convert_video_cascade,
+                            input_path, output_format, codec, self.output_dir,
+                            rung_resolutions, progress_callback, output_filenames,
+                            bitrate_value, fps
+                        )
+                    if needs_gpu:
+                        async with gpu_lock:
+                            return await self.converter.convert_video_async(
+                                input_path, output_format, codec, self.output_dir,
+                                progress_callback, output_filenames[0],
+                                resolution, bitrate_value, fps
+                            )
+                    return await self.converter.convert_video_async(
+                        input_path, output_format, codec, self.output_dir,
+                        progress_callback, output_filenames[0],
+                        resolution, bitrate_value, fps
                     )
 
-                    if success:
-                        output_path = os.path.join(self.output_dir, output_filename)
-                        if os.path.exists(output_path):
-                            output_files.append(output_path)
-                    results.append(message)
-
-                except Exception as e:
-                    print(f"Detailed error for {file.name}: {str(e)}")  # Debug print
-                    results.append(f"Error processing {os.path.basename(file.name)}: {str(e)}")
-
-        finally:
-            # Clean up temporary files
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except Exception as e:
-                    print(f"Error cleaning up {temp_file}: {str(e)}")
-
-        success_count = sum(1 for msg in results if "Successfully" in msg)
+            return await asyncio.gather(
+                *(run_one(i, path, outs) for i, (path, _, outs) in enumerate(jobs)),
+                return_exceptions=True
+            )
+
+        # One record per job; counts and download paths fall out of a
+        # single pass instead of three parallel lists
+        records = []
+        for (input_path, original_filename, output_filenames), outcome in zip(
+                jobs, asyncio.run(run_batch())):
+            if isinstance(outcome, Exception):
+                print(f"Detailed error for {original_filename}: {str(outcome)}")  # Debug print
+                records.append({
+                    "name": original_filename,
+                    "ok": False,
+                    "msg": f"Error processing {original_filename}: {str(outcome)}",
+                    "outputs": []
+                })
+                continue
+            success, message = outcome
+            outputs = []
+            if success:
+                for output_filename in output_filenames:
+                    output_path = os.path.join(self.output_dir, output_filename)
+                    if os.path.exists(output_path):
+                        outputs.append(output_path)
+            records.append({
+                "name": original_filename,
+                "ok": success,
+                "msg": message,
+                "outputs": outputs
+            })
+
+        success_count = sum(1 for record in records if record["ok"])
+        output_files = [path for record in records for path in record["outputs"]]
         report = f"Conversion completed: {success_count}/{total_files} files converted successfully\n\n"
-        report += "\n".join(results)
+        report += "\n".join(record["msg"] for record in records)
 
         return report, output_files if output_files else None
 
@@ -176,17 +259,18 @@ class VideoConverterGUI:
                 # Add output resolution, bitrate, and fps options
                 with gr.Row():
                     resolution_dropdown = gr.Dropdown(
-                        choices=[
-                            "Same as input",
-                            "3840x2160 (4K)",
-                            "2560x1440 (1440p)",
-                            "1920x1080 (1080p)",
-                            "1280x720 (720p)",
-                            "854x480 (480p)"
-                        ],
+                        choices=["Same as input"] + self.resolution_ladder,
                         value="Same as input",
                         label="Output Resolution"
                     )
+                    ladder_checkbox = gr.Checkbox(
+                        value=False,
+                        label="Generate resolution ladder",
+                        info="Also encode every lower resolution, each rung "
+                             "transcoded from the one above (faster than "
+                             "re-decoding the source, but each step adds a "
+                             "small generational quality loss)"
+                    )
                 with gr.Row():
                     bitrate_input = gr.Textbox(
                         label="Output Bitrate",
@@ -247,6 +331,7 @@ class VideoConverterGUI:
                     format_dropdown,
                     codec_dropdown,
                     resolution_dropdown,
+                    ladder_checkbox,
                     bitrate_input,
                     bitrate_unit,
                     fps_dropdown
@@ -1,22 +1,60 @@
+import asyncio
+import ctypes
+import functools
 import os
 import re
 import subprocess
-import torch
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 import platform
 
+# Matches the -progress pipe:1 byte stream; compiled once, not per line
+_TIME_RE = re.compile(rb'out_time_us=(\d+)')
+
+
+class OutputSpec(NamedTuple):
+    """One output variant for a multi-output conversion."""
+    format: str
+    codec: str
+    resolution: str = "Same as input"
+    bitrate: str = "auto"
+    fps: str = "Same as input"
+    filename: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_duration(ffprobe_path: str, input_path: str, mtime: float) -> float:
+    """Probe a file's duration in seconds (cached per path+mtime)."""
+    output = subprocess.check_output([
+        ffprobe_path,
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        input_path
+    ], universal_newlines=True)
+    return float(output.strip())
+
+
 class VideoConverter:
-    def __init__(self):
+    def __init__(self, use_pyav: bool = False):
+        # In-process libav backend (PyAV): skips one OS process spawn and
+        # codec-registry init per file, which matters for many small clips
+        self.use_pyav = use_pyav
         # Check the operating system
         if platform.system() == 'Windows':
-            # Windows-specific FFmpeg path
+            # Windows-specific FFmpeg paths
             self.ffmpeg_path = os.path.join(os.getcwd(), "ffmpeg", "bin", "ffmpeg.exe")
+            self.ffprobe_path = os.path.join(os.getcwd(), "ffmpeg", "bin", "ffprobe.exe")
         else:
             # On Linux, assume FFmpeg is installed and available in PATH
             self.ffmpeg_path = "ffmpeg"
-        self.gpu_available = torch.cuda.is_available()
+            self.ffprobe_path = "ffprobe"
+        self.gpu_available = self._detect_cuda()
+        # CPU threads each FFmpeg child may use; callers running several
+        # children at once should lower this to avoid oversubscription
+        self.threads = os.cpu_count() or 1
         self.formats = ["MP4", "MKV", "AVI", "MOV", "WMV", "FLV", "MPEG"]
         self.codecs = [
             "H.264",
@@ -28,33 +66,56 @@ class VideoConverter:
             "ProRes Standard",
             "ProRes HQ"
         ]
-
-    def get_codec_params(self, codec: str) -> List[str]:
-        codec_params = {
-            "H.264": ["-c:v", "libx264", "-preset", "medium"],
-            "HEVC (H.265)": ["-c:v", "libx265", "-preset", "medium"],
-            "MPEG-4 (Part 2)": ["-c:v", "mpeg4"],
-            "MPEG-2": ["-c:v", "mpeg2video"],
-            "ProRes Proxy": ["-c:v", "prores_ks", "-profile:v", "0"],
-            "ProRes Light": ["-c:v", "prores_ks", "-profile:v", "1"],
-            "ProRes Standard": ["-c:v", "prores_ks", "-profile:v", "2"],
-            "ProRes HQ": ["-c:v", "prores_ks", "-profile:v", "3"]
+        self.resolution_map = {
+            "3840x2160 (4K)": "3840:2160",
+            "2560x1440 (1440p)": "2560:1440",
+            "1920x1080 (1080p)": "1920:1080",
+            "1280x720 (720p)": "1280:720",
+            "854x480 (480p)": "854:480"
+        }
+        # Immutable codec argument tuples, built once instead of per call
+        self._codec_args = {
+            "H.264": ("-c:v", "libx264", "-preset", "medium"),
+            "HEVC (H.265)": ("-c:v", "libx265", "-preset", "medium"),
+            "MPEG-4 (Part 2)": ("-c:v", "mpeg4"),
+            "MPEG-2": ("-c:v", "mpeg2video"),
+            "ProRes Proxy": ("-c:v", "prores_ks", "-profile:v", "0"),
+            "ProRes Light": ("-c:v", "prores_ks", "-profile:v", "1"),
+            "ProRes Standard": ("-c:v", "prores_ks", "-profile:v", "2"),
+            "ProRes HQ": ("-c:v", "prores_ks", "-profile:v", "3")
         }
-        return codec_params.get(codec, ["-c:v", "libx264", "-preset", "medium"])
+        # NVENC encoder args; the rate-control mode is chosen alongside
+        # the quality settings (constqp for auto, vbr for explicit rates)
+        self._gpu_codec_args = {
+            "H.264": ("-c:v", "h264_nvenc", "-preset", "p4", "-tune", "hq"),
+            "HEVC (H.265)": ("-c:v", "hevc_nvenc", "-preset", "p4", "-tune", "hq")
+        }
+
+    @staticmethod
+    def _detect_cuda() -> bool:
+        """Check for a usable CUDA device via the driver library.
+
+        Replaces torch.cuda.is_available(): importing torch took seconds
+        and hundreds of MB of RSS just to answer a yes/no question.
+        """
+        lib_name = "nvcuda.dll" if platform.system() == "Windows" else "libcuda.so.1"
+        try:
+            cuda = ctypes.CDLL(lib_name)
+            if cuda.cuInit(0) != 0:
+                return False
+            count = ctypes.c_int(0)
+            return cuda.cuDeviceGetCount(ctypes.byref(count)) == 0 and count.value > 0
+        except OSError:
+            return False
+
+    def get_codec_params(self, codec: str, gpu: bool = False) -> List[str]:
+        if gpu and codec in self._gpu_codec_args:
+            return list(self._gpu_codec_args[codec])
+        return list(self._codec_args.get(codec, self._codec_args["H.264"]))
 
     def get_video_duration(self, input_path: str) -> float:
-        cmd = [
-            self.ffmpeg_path,
-            "-i",
-            input_path
-        ]
         try:
-            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, universal_newlines=True)
-            for line in output.split('\n'):
-                if "Duration" in line:
-                    time_str = line.split("Duration: ")[1].split(",")[0]
-                    h, m, s = time_str.split(':')
-                    return float(h) * 3600 + float(m) * 60 + float(s)
+            return _probe_duration(self.ffprobe_path, input_path, os.path.getmtime(input_path))
         except Exception as e:
             print(f"Error getting video duration: {e}")
             return 0
@@ -78,56 +139,131 @@ class VideoConverter:
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
 
-            output_path = os.path.join(output_dir, output_filename)
+            if self.use_pyav:
+                return self._convert_pyav(
+                    input_path, codec, output_dir, progress_callback,
+                    output_filename, output_resolution, output_bitrate, output_fps
+                )
 
-            # Base FFmpeg command
-            cmd = [
-                self.ffmpeg_path,
-                "-y"
-            ]
+            cmd = self._build_command(
+                input_path, codec, output_dir, output_filename,
+                output_resolution, output_bitrate, output_fps
+            )
 
-            # Add GPU acceleration if available
-            if self.gpu_available:
-                if codec in ["H.264", "HEVC (H.265)"]:
-                    cmd.extend(["-hwaccel", "cuda"])
+            # Print the FFmpeg command for debugging
+            print("FFmpeg command:", ' '.join(cmd))
 
-            # Add input file
-            cmd.extend([
-                "-i", input_path
-            ])
+            duration = self.get_video_duration(input_path)
+            print(f"Video duration: {duration} seconds")
 
-            # Add codec parameters
-            cmd.extend(self.get_codec_params(codec))
-
-            # Add scaling if necessary
-            if output_resolution != "Same as input":
-                resolution_map = {
-                    "3840x2160 (4K)": "3840:2160",
-                    "2560x1440 (1440p)": "2560:1440",
-                    "1920x1080 (1080p)": "1920:1080",
-                    "1280x720 (720p)": "1280:720",
-                    "854x480 (480p)": "854:480"
-                }
-                scale = resolution_map.get(output_resolution)
-                if scale:
-                    cmd.extend(["-vf", f"scale={scale}"])
+            return self._run_ffmpeg(
+                cmd, input_path, duration, progress_callback,
+                f"Successfully converted: {output_filename}"
+            )
+
+        except Exception as e:
+            return False, f"Error converting {Path(input_path).name}: {str(e)}"
+
+    def _convert_pyav(
+            self,
+            input_path: str,
+            codec: str,
+            output_dir: str,
+            progress_callback: Optional[callable],
+            output_filename: str,
+            output_resolution: str,
+            output_bitrate: str,
+            output_fps: str
+    ) -> Tuple[bool, str]:
+        """Decode and re-encode in-process via libav (PyAV).
+
+        Video-only; audio passthrough is left to the CLI backend. Skips
+        the process spawn and codec-registry init the CLI pays per file.
+        """
+        import av
+
+        output_path = os.path.join(output_dir, output_filename)
+        # (encoder, pixel format, encoder options) per codec; ProRes
+        # needs 10-bit 4:2:2 and an explicit profile, mirroring the
+        # -profile:v values in _codec_args
+        encoder_settings = {
+            "H.264": ("libx264", "yuv420p", None),
+            "HEVC (H.265)": ("libx265", "yuv420p", None),
+            "MPEG-4 (Part 2)": ("mpeg4", "yuv420p", None),
+            "MPEG-2": ("mpeg2video", "yuv420p", None),
+            "ProRes Proxy": ("prores_ks", "yuv422p10le", {"profile": "0"}),
+            "ProRes Light": ("prores_ks", "yuv422p10le", {"profile": "1"}),
+            "ProRes Standard": ("prores_ks", "yuv422p10le", {"profile": "2"}),
+            "ProRes HQ": ("prores_ks", "yuv422p10le", {"profile": "3"})
+        }
+        encoder, pix_fmt, encoder_options = encoder_settings.get(
+            codec, ("libx264", "yuv420p", None))
+
+        duration = self.get_video_duration(input_path)
+
+        with av.open(input_path) as in_container:
+            in_stream = in_container.streams.video[0]
 
-            # Add FPS if specified
+            rate = in_stream.average_rate
             if output_fps != "Same as input":
-                cmd.extend(["-r", output_fps])
+                rate = float(output_fps)
 
-            # Add bitrate or CRF settings
-            if output_bitrate.lower() != "auto":
-                cmd.extend(["-b:v", output_bitrate])
-            else:
-                # Use a default CRF value for quality
-                cmd.extend(["-crf", "23"])
+            width, height = in_stream.width, in_stream.height
+            scale = self.resolution_map.get(output_resolution)
+            if output_resolution != "Same as input" and scale:
+                width, height = (int(v) for v in scale.split(":"))
+
+            with av.open(output_path, "w") as out_container:
+                out_stream = out_container.add_stream(
+                    encoder, rate=rate, options=encoder_options or {})
+                out_stream.width = width
+                out_stream.height = height
+                out_stream.pix_fmt = pix_fmt
+                if output_bitrate.lower() != "auto":
+                    unit = output_bitrate[-1]
+                    value = float(output_bitrate[:-1])
+                    out_stream.bit_rate = int(value * (1e6 if unit == "M" else 1e3))
 
-            # Optionally, you can add audio codec settings
-            # cmd.extend(["-c:a", "aac", "-b:a", "128k"])
+                for frame in in_container.decode(in_stream):
+                    if (width, height) != (frame.width, frame.height):
+                        frame = frame.reformat(width=width, height=height)
+                    for packet in out_stream.encode(frame):
+                        out_container.mux(packet)
+                    if progress_callback and duration > 0 and frame.time is not None:
+                        progress_callback(frame.time / duration)
 
-            # Add output file
-            cmd.append(output_path)
+                # Flush the encoder
+                for packet in out_stream.encode():
+                    out_container.mux(packet)
+
+        return True, f"Successfully converted: {output_filename}"
+
+    async def convert_video_async(
+            self,
+            input_path: str,
+            output_format: str,
+            codec: str,
+            output_dir: str,
+            progress_callback: Optional[callable] = None,
+            output_filename: Optional[str] = None,
+            output_resolution: str = "Same as input",
+            output_bitrate: str = "auto",
+            output_fps: str = "Same as input"
+    ) -> Tuple[bool, str]:
+        """Async twin of convert_video, so one event loop can multiplex
+        several concurrent FFmpeg children without a thread per encode.
+        """
+        try:
+            if not os.path.exists(input_path):
+                return False, f"Input file does not exist: {Path(input_path).name}"
+
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            cmd = self._build_command(
+                input_path, codec, output_dir, output_filename,
+                output_resolution, output_bitrate, output_fps
+            )
 
             # Print the FFmpeg command for debugging
             print("FFmpeg command:", ' '.join(cmd))
@@ -135,40 +271,327 @@ class VideoConverter:
             duration = self.get_video_duration(input_path)
             print(f"Video duration: {duration} seconds")
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Combine stderr into stdout
-                universal_newlines=True
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=1 << 20
             )
 
+            report_progress = progress_callback is not None and duration > 0
+            inv_duration = 1e-6 / duration if duration > 0 else 0.0
+            recent_lines = deque(maxlen=200)
+
             while True:
-                line = process.stdout.readline()
+                line = await process.stdout.readline()
                 if not line:
-                    if process.poll() is not None:
-                        break
-                    continue
-
-                # Print the line for debugging
-                print("FFmpeg output:", line.strip())
-
-                if "frame=" in line and progress_callback and duration > 0:
-                    # Extract time from the output
-                    match = re.search(r'time=(\d+:\d+:\d+\.\d+)', line)
+                    break
+                recent_lines.append(line.rstrip(b'\n'))
+                if report_progress:
+                    match = _TIME_RE.search(line)
                     if match:
-                        time_str = match.group(1)
-                        h, m, s = time_str.split(':')
-                        current_time = float(h) * 3600 + float(m) * 60 + float(s)
-                        progress = current_time / duration
-                        progress_callback(progress)
+                        progress_callback(int(match.group(1)) * inv_duration)
 
-            process.wait()
+            returncode = await process.wait()
 
-            if process.returncode == 0:
+            if returncode == 0:
                 return True, f"Successfully converted: {output_filename}"
+            error_output = b'\n'.join(recent_lines).decode(errors="replace")
+            return False, f"Error converting {Path(input_path).name}: FFmpeg error code {returncode}\n{error_output}"
+
+        except Exception as e:
+            return False, f"Error converting {Path(input_path).name}: {str(e)}"
+
+    def _build_command(
+            self,
+            input_path: str,
+            codec: str,
+            output_dir: str,
+            output_filename: str,
+            output_resolution: str,
+            output_bitrate: str,
+            output_fps: str
+    ) -> List[str]:
+        """Assemble the full single-output FFmpeg command line."""
+        output_path = os.path.join(output_dir, output_filename)
+
+        # Use GPU decode + NVENC encode when available, keeping frames
+        # on-GPU so decode -> scale -> encode avoids PCIe roundtrips
+        use_gpu = self.gpu_available and codec in ["H.264", "HEVC (H.265)"]
+        in_flags = ("-hwaccel", "cuda", "-hwaccel_output_format", "cuda") if use_gpu else ()
+
+        # -progress pipe:1 emits machine-readable key=value progress
+        # instead of the human stats line
+        return [
+            self.ffmpeg_path,
+            "-y",
+            "-progress", "pipe:1",
+            "-nostats",
+            *in_flags,
+            "-i", input_path,
+            *self._build_cmd_tail(codec, output_resolution, output_bitrate,
+                                  output_fps, use_gpu, self.threads),
+            output_path
+        ]
+
+    @functools.lru_cache(maxsize=64)
+    def _build_cmd_tail(
+            self,
+            codec: str,
+            output_resolution: str,
+            output_bitrate: str,
+            output_fps: str,
+            use_gpu: bool,
+            threads: int
+    ) -> Tuple[str, ...]:
+        """Flags between '-i input' and the output path, cached per shape.
+
+        Batches reuse the same settings for every file, so this tuple is
+        built once and splatted into each command.
+        """
+        tail = list(self.get_codec_params(codec, use_gpu))
+
+        # Pin encoder and filter thread counts; the scale filter in
+        # particular runs single-threaded by default
+        tail.extend([
+            "-threads", str(threads),
+            "-filter_threads", str(threads),
+            "-filter_complex_threads", str(threads)
+        ])
+        if not use_gpu and codec == "HEVC (H.265)":
+            tail.extend(["-x265-params", f"pools={threads}:frame-threads={min(threads, 16)}"])
+
+        # Add scaling if necessary
+        if output_resolution != "Same as input":
+            scale = self.resolution_map.get(output_resolution)
+            if scale:
+                # Frames are CUDA surfaces on the GPU path
+                scale_filter = "scale_cuda" if use_gpu else "scale"
+                tail.extend(["-vf", f"{scale_filter}={scale}"])
+
+        # Add FPS if specified
+        if output_fps != "Same as input":
+            tail.extend(["-r", output_fps])
+
+        # Add bitrate or quality settings
+        if output_bitrate.lower() != "auto":
+            if use_gpu:
+                # constqp would make NVENC ignore the requested bitrate
+                tail.extend(["-rc", "vbr"])
+            tail.extend(["-b:v", output_bitrate])
+        elif use_gpu:
+            # NVENC ignores -crf; set constant QP instead
+            tail.extend(["-rc", "constqp", "-qp", "28" if codec == "HEVC (H.265)" else "23"])
+        else:
+            # Use a default CRF value for quality
+            tail.extend(["-crf", "23"])
+
+        # Optionally, you can add audio codec settings
+        # tail.extend(["-c:a", "aac", "-b:a", "128k"])
+
+        # Let the muxer fill its I/O buffer instead of flushing each
+        # packet, so the output file sees few large writes
+        tail.extend(["-flush_packets", "0"])
+
+        return tuple(tail)
+
+    def convert_video_cascade(
+            self,
+            input_path: str,
+            output_format: str,
+            codec: str,
+            output_dir: str,
+            resolutions: List[str],
+            progress_callback: Optional[callable] = None,
+            output_filenames: Optional[List[str]] = None,
+            output_bitrate: str = "auto",
+            output_fps: str = "Same as input"
+    ) -> Tuple[bool, str]:
+        """Encode a descending resolution ladder by transcoding each rung
+        from the previous rung's output instead of the full-size source,
+        so decode cost shrinks with pixel area at every step.
+
+        Note: each step re-encodes the previous encode, so lower rungs
+        accumulate generational quality loss.
+        """
+        def pixel_area(resolution):
+            scale = self.resolution_map.get(resolution)
+            if not scale:
+                return 0
+            w, h = scale.split(":")
+            return int(w) * int(h)
+
+        order = sorted(range(len(resolutions)),
+                       key=lambda i: pixel_area(resolutions[i]), reverse=True)
+
+        messages = []
+        current_input = input_path
+        n = len(resolutions)
+        for step, i in enumerate(order):
+            resolution = resolutions[i]
+            if output_filenames:
+                output_filename = output_filenames[i]
             else:
-                error_output = process.stdout.read()
-                return False, f"Error converting {Path(input_path).name}: FFmpeg error code {process.returncode}\n{error_output}"
+                output_filename = f"{Path(input_path).stem}_{step}.{output_format.lower()}"
+
+            step_callback = None
+            if progress_callback:
+                def step_callback(fp, _base=step):
+                    progress_callback((_base + fp) / n)
+
+            success, message = self.convert_video(
+                current_input, output_format, codec, output_dir,
+                step_callback, output_filename,
+                resolution, output_bitrate, output_fps
+            )
+            messages.append(message)
+            if not success:
+                return False, "\n".join(messages)
+
+            # The next, smaller rung transcodes from this output
+            current_input = os.path.join(output_dir, output_filename)
+
+        return True, "\n".join(messages)
+
+    def convert_video_multi(
+            self,
+            input_path: str,
+            outputs: List[OutputSpec],
+            output_dir: str,
+            progress_callback: Optional[callable] = None
+    ) -> Tuple[bool, str]:
+        """Produce several output variants from one input in a single
+        FFmpeg invocation: one decode, a split filter graph, N encoders.
+
+        Collapses to the single-output path when only one spec is given.
+        """
+        if len(outputs) == 1:
+            spec = outputs[0]
+            return self.convert_video(
+                input_path, spec.format, spec.codec, output_dir,
+                progress_callback, spec.filename,
+                spec.resolution, spec.bitrate, spec.fps
+            )
+
+        try:
+            if not os.path.exists(input_path):
+                return False, f"Input file does not exist: {Path(input_path).name}"
+
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            cmd = [
+                self.ffmpeg_path,
+                "-y",
+                "-progress", "pipe:1",
+                "-nostats"
+            ]
+
+            # GPU decode still helps; frames stay in system memory so the
+            # split/scale filters work unchanged
+            use_gpu = self.gpu_available and all(
+                spec.codec in ["H.264", "HEVC (H.265)"] for spec in outputs
+            )
+            if use_gpu:
+                cmd.extend(["-hwaccel", "cuda"])
+
+            cmd.extend([
+                "-i", input_path
+            ])
+
+            # Split the decoded stream once, then scale each branch
+            n = len(outputs)
+            graph = f"[0:v]split={n}" + "".join(f"[v{i}]" for i in range(n))
+            for i, spec in enumerate(outputs):
+                scale = self.resolution_map.get(spec.resolution)
+                if scale:
+                    graph += f";[v{i}]scale={scale}[s{i}]"
+                else:
+                    graph += f";[v{i}]null[s{i}]"
+            cmd.extend(["-filter_complex", graph])
+            cmd.extend([
+                "-threads", str(self.threads),
+                "-filter_complex_threads", str(self.threads)
+            ])
+
+            # Per-output mapping, codec, and quality settings
+            output_names = []
+            for i, spec in enumerate(outputs):
+                cmd.extend(["-map", f"[s{i}]", "-map", "0:a?"])
+                cmd.extend(self.get_codec_params(spec.codec, use_gpu))
+                if spec.fps != "Same as input":
+                    cmd.extend(["-r", spec.fps])
+                if spec.bitrate.lower() != "auto":
+                    if use_gpu:
+                        # constqp would make NVENC ignore the requested bitrate
+                        cmd.extend(["-rc", "vbr"])
+                    cmd.extend(["-b:v", spec.bitrate])
+                elif use_gpu:
+                    cmd.extend(["-rc", "constqp", "-qp", "28" if spec.codec == "HEVC (H.265)" else "23"])
+                else:
+                    cmd.extend(["-crf", "23"])
+                cmd.extend(["-flush_packets", "0"])
+                output_name = spec.filename or (
+                    f"{Path(input_path).stem}_{i}.{spec.format.lower()}"
+                )
+                output_names.append(output_name)
+                cmd.append(os.path.join(output_dir, output_name))
+
+            print("FFmpeg command:", ' '.join(cmd))
+
+            duration = self.get_video_duration(input_path)
+            print(f"Video duration: {duration} seconds")
+
+            return self._run_ffmpeg(
+                cmd, input_path, duration, progress_callback,
+                f"Successfully converted: {', '.join(output_names)}"
+            )
 
         except Exception as e:
             return False, f"Error converting {Path(input_path).name}: {str(e)}"
+
+    def _run_ffmpeg(
+            self,
+            cmd: List[str],
+            input_path: str,
+            duration: float,
+            progress_callback: Optional[callable],
+            success_message: str
+    ) -> Tuple[bool, str]:
+        """Run an FFmpeg command, streaming progress to the callback."""
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,  # Combine stderr into stdout
+            bufsize=1024 * 1024
+        )
+
+        # Read in large chunks rather than one syscall per line; only the
+        # out_time_us progress lines are worth decoding. Keep a bounded
+        # tail of recent lines for diagnostics if FFmpeg fails.
+        # read1() returns as soon as any data arrives — a plain read()
+        # would block until a full 64 KB accumulated, stalling progress.
+        report_progress = progress_callback is not None and duration > 0
+        inv_duration = 1e-6 / duration if duration > 0 else 0.0
+        recent_lines = deque(maxlen=200)
+        tail = bytearray()
+        for chunk in iter(lambda: process.stdout.read1(65536), b''):
+            tail.extend(chunk)
+            lines = tail.split(b'\n')
+            tail = bytearray(lines.pop())
+            recent_lines.extend(lines)
+            if report_progress:
+                for line in lines:
+                    match = _TIME_RE.search(line)
+                    if match:
+                        progress_callback(int(match.group(1)) * inv_duration)
+        if tail:
+            recent_lines.append(bytes(tail))
+
+        process.wait()
+
+        if process.returncode == 0:
+            return True, success_message
+        else:
+            error_output = b'\n'.join(recent_lines).decode(errors="replace")
+            return False, f"Error converting {Path(input_path).name}: FFmpeg error code {process.returncode}\n{error_output}"